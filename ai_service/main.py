@@ -3,6 +3,7 @@ DevMind - Python FastAPI AI Service.
 All AI/ML logic: embeddings, RAG, code explanation, documentation.
 """
 
+import math
 import os
 import shutil
 import tempfile
@@ -12,30 +13,92 @@ from dotenv import load_dotenv
 
 # Load .env from project root
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 from rag.chroma_client import ChromaClient
+from rag.concurrency import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    RateLimited,
+    RequestScheduler,
+    run_with_priority,
+)
+from rag.reranker import Reranker
 from rag.repo_loader import clone_repo, load_source_files
-from rag.rag_pipeline import answer_question, explain_code, generate_docs
+from rag.rag_pipeline import answer_question, condense_history, explain_code, generate_docs
+from rag.sessions import ChatSession, SessionStore, covered_by
+from rag.repo_map import RepoMapBuilder, RepoMapStore, format_structure, representative_files, subset
 
 # Chroma persistent directory (default: parent chroma_db)
 CHROMA_DIR = os.getenv("CHROMA_PERSIST_DIR", os.path.join(os.path.dirname(__file__), "..", "chroma_db"))
 
-# Global Chroma client (initialized on startup)
+# Repo maps (file tree, symbols, imports) built at ingest, one JSON file per repo
+REPO_MAP_DIR = os.getenv("REPO_MAP_DIR", os.path.join(CHROMA_DIR, "repo_maps"))
+
+# Doc generation: representative files seeded from the repo map
+DOCS_SEED_FILES = 10
+DOCS_STRUCTURE_MAX_FILES = 40
+
+# Optional cross-encoder rerank stage between Chroma retrieval and the LLM
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "2"))
+
+# Number of chunks passed to the LLM for /api/ask
+ASK_TOP_K = 5
+
+# Chat sessions: follow-ups reuse the previous turn's chunks and only fetch a few new ones
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "500"))
+# Follow-up context stays at ASK_TOP_K chunks and the history at <= 3 turns
+# (answers truncated) plus the summary, so prompts stay bounded however long the chat
+SESSION_RECENT_TURNS = 2  # Turns kept verbatim in the prompt
+SESSION_CONDENSE_BATCH = 2  # Older turns folded into the summary per LLM call
+FOLLOWUP_NEW_CHUNKS = 2  # New hits swapped in per follow-up that needs a search
+
+session_store = SessionStore(max_sessions=SESSION_MAX, ttl_seconds=SESSION_TTL_SECONDS)
+
+# LLM-backed endpoints: token bucket per user/repo, interactive (/api/ask,
+# /api/explain) ahead of bulk (/api/generate-docs). Concurrent upstream calls
+# are capped in rag_pipeline (LLM_MAX_CONCURRENCY), after coalescing.
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+
+scheduler = RequestScheduler(
+    rate_per_minute=RATE_LIMIT_PER_MINUTE,
+    burst=RATE_LIMIT_BURST,
+    max_wait=RATE_LIMIT_MAX_WAIT,
+)
+
+# Global Chroma client, repo map store and reranker (initialized on startup)
 chroma_client: Optional[ChromaClient] = None
+repo_map_store: Optional[RepoMapStore] = None
+reranker: Optional[Reranker] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize Chroma client on startup."""
-    global chroma_client
+    """Initialize Chroma client and repo map store (and warm the reranker, if enabled) on startup."""
+    global chroma_client, repo_map_store, reranker
     chroma_client = ChromaClient(persist_directory=CHROMA_DIR)
+    repo_map_store = RepoMapStore(REPO_MAP_DIR)
+    if RERANK_ENABLED:
+        reranker = Reranker(
+            model_name=RERANK_MODEL, budget_ms=RERANK_BUDGET_MS, max_workers=RERANK_WORKERS
+        )
+        reranker.warmup()
     yield
     chroma_client = None
+    repo_map_store = None
+    reranker = None
 
 
 app = FastAPI(
@@ -74,11 +137,23 @@ class AskRequest(BaseModel):
     """RAG question request."""
     question: str
     repo_id: Optional[str] = None
+    session_id: Optional[str] = None  # From /api/sessions; omit for a stateless question
 
 
 class AskResponse(BaseModel):
     """RAG question response."""
     answer: str
+    session_id: Optional[str] = None  # May differ from the request if the session expired
+
+
+class SessionRequest(BaseModel):
+    """Chat session create request."""
+    repo_id: Optional[str] = None
+
+
+class SessionResponse(BaseModel):
+    """Chat session create response."""
+    session_id: str
 
 
 class ExplainRequest(BaseModel):
@@ -102,6 +177,15 @@ class GenerateDocsResponse(BaseModel):
     documentation: str
 
 
+class RepoMapResponse(BaseModel):
+    """Repository map: file tree, per-file symbols, import graph, size stats."""
+    repo_id: str
+    tree: dict
+    files: dict
+    imports: dict
+    stats: dict
+
+
 # --- Endpoints ---
 
 
@@ -127,31 +211,42 @@ async def ingest_repo(req: IngestRequest):
         raise HTTPException(status_code=503, detail="Chroma not initialized")
     if not req.repo_url or not req.repo_id:
         raise HTTPException(status_code=400, detail="repo_url and repo_id required")
+    # Clone, file reads and embedding all block; keep them off the event loop
+    return await run_in_threadpool(_ingest, req)
+
 
+def _ingest(req: IngestRequest) -> IngestResponse:
     temp_dir = tempfile.mkdtemp(prefix="devmind_repo_")
     try:
-        clone_repo(req.repo_url, temp_dir, branch=req.branch)
-        files = load_source_files(temp_dir)
-    except Exception as e:
-        return IngestResponse(
-            success=False,
-            message=f"Failed to clone or load repo: {str(e)}",
-            files_processed=0,
-            chunks_added=0,
-        )
+        try:
+            clone_repo(req.repo_url, temp_dir, branch=req.branch)
+        except Exception as e:
+            return IngestResponse(
+                success=False,
+                message=f"Failed to clone or load repo: {str(e)}",
+                files_processed=0,
+                chunks_added=0,
+            )
+
+        # Remove existing chunks for this repo
+        chroma_client.delete_repo(req.repo_id)
+
+        # Files are streamed (large ones in windows), so the clone must outlive this loop
+        chunks_added = 0
+        map_builder = RepoMapBuilder(req.repo_id)
+        seen_files = set()
+        for file_path, content, start_line, offset in load_source_files(temp_dir):
+            n = chroma_client.add_repo(
+                req.repo_id, file_path, content, start_line=start_line, byte_offset=offset
+            )
+            map_builder.add_file(file_path, content, start_line=start_line)
+            chunks_added += n
+            seen_files.add(file_path)
+        files_processed = len(seen_files)
+        repo_map_store.save(map_builder.build())
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
 
-    # Remove existing chunks for this repo
-    chroma_client.delete_repo(req.repo_id)
-
-    files_processed = 0
-    chunks_added = 0
-    for file_path, content in files:
-        n = chroma_client.add_repo(req.repo_id, file_path, content)
-        chunks_added += n
-        files_processed += 1
-
     return IngestResponse(
         success=True,
         message=f"Ingested {files_processed} files",
@@ -160,41 +255,168 @@ async def ingest_repo(req: IngestRequest):
     )
 
 
+def _too_many_requests(e: RateLimited) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests, please retry shortly",
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+
+async def _run_scheduled(user: Optional[str], repo_id: Optional[str], priority: int, fn, *args, **kwargs):
+    """
+    Take a token for this user/repo, then run blocking fn in the threadpool at
+    the given priority. 429 if no token or no upstream LLM slot frees up in time.
+    """
+    try:
+        await scheduler.acquire(f"{user or 'anonymous'}:{repo_id or '*'}", priority)
+        return await run_in_threadpool(run_with_priority, priority, fn, *args, **kwargs)
+    except RateLimited as e:
+        raise _too_many_requests(e)
+
+
+def _retrieve(question: str, repo_id: Optional[str], previous_ids: Optional[List[str]] = None) -> List[dict]:
+    """
+    Retrieve context chunks for a question.
+    With previous_ids (a session follow-up), the earlier chunks are kept and
+    a few new hits replace the oldest of them; the vector search is skipped
+    entirely when the earlier context already covers the question.
+    """
+    if not previous_ids:
+        n = max(RERANK_CANDIDATES, ASK_TOP_K) if reranker else ASK_TOP_K
+        candidates = chroma_client.query(question, repo_id=repo_id, n_results=n)
+        if reranker:
+            # Over-fetched: keep the best ASK_TOP_K by cross-encoder score
+            return reranker.rerank(question, candidates, top_k=ASK_TOP_K)
+        return candidates[:ASK_TOP_K]
+
+    previous = chroma_client.get_chunks(previous_ids)[-ASK_TOP_K:]
+    if previous and covered_by(question, previous):
+        return previous
+
+    seen = {c["id"] for c in previous}
+    n = RERANK_CANDIDATES if reranker else FOLLOWUP_NEW_CHUNKS
+    new = [c for c in chroma_client.query(question, repo_id=repo_id, n_results=n) if c["id"] not in seen]
+    if reranker:
+        new = reranker.rerank(question, new, top_k=FOLLOWUP_NEW_CHUNKS)
+    new = new[:FOLLOWUP_NEW_CHUNKS]
+    # Previous context first, oldest dropped to make room; total stays at ASK_TOP_K
+    keep = ASK_TOP_K - len(new)
+    return previous[len(previous) - keep:] + new if keep else new
+
+
+@app.post("/api/sessions", response_model=SessionResponse)
+async def create_session(req: SessionRequest):
+    """
+    Start a chat session for multi-turn /api/ask.
+    """
+    session = session_store.create(repo_id=req.repo_id)
+    return SessionResponse(session_id=session.session_id)
+
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """
+    End a chat session.
+    """
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"success": True}
+
+
 @app.post("/api/ask", response_model=AskResponse)
-async def ask(req: AskRequest):
+async def ask(req: AskRequest, x_devmind_user: Optional[str] = Header(None)):
     """
     RAG question answering over ingested codebase.
+    With session_id, prior turns and their context are reused server-side.
     """
     if not chroma_client:
         raise HTTPException(status_code=503, detail="Chroma not initialized")
 
-    chunks = chroma_client.query(req.question, repo_id=req.repo_id, n_results=5)
-    answer = answer_question(req.question, chunks, repo_id=req.repo_id)
-    return AskResponse(answer=answer)
+    return await _run_scheduled(x_devmind_user, req.repo_id, PRIORITY_INTERACTIVE, _ask, req)
+
+
+def _ask(req: AskRequest) -> AskResponse:
+    """Blocking part of /api/ask (retrieval + LLM), run in the threadpool."""
+    session: Optional[ChatSession] = None
+    if req.session_id:
+        session = session_store.resume(req.session_id, repo_id=req.repo_id)
+
+    if session is None:
+        chunks = _retrieve(req.question, req.repo_id)
+        answer = answer_question(req.question, chunks, repo_id=req.repo_id)
+        return AskResponse(answer=answer)
+
+    # One turn at a time per session, so turns and the summary stay consistent
+    with session.lock:
+        chunks = _retrieve(req.question, req.repo_id, previous_ids=session.last_chunk_ids)
+        answer = answer_question(
+            req.question, chunks, repo_id=req.repo_id, history=session.history_prompt()
+        )
+        session.add_turn(req.question, answer, [c["id"] for c in chunks])
+        overflow = session.pop_overflow(SESSION_RECENT_TURNS, SESSION_CONDENSE_BATCH)
+        if overflow:
+            session.summary = condense_history(session.summary, overflow)
+    return AskResponse(answer=answer, session_id=session.session_id)
 
 
 @app.post("/api/explain", response_model=ExplainResponse)
-async def explain(req: ExplainRequest):
+async def explain(req: ExplainRequest, x_devmind_user: Optional[str] = Header(None)):
     """
     Explain a piece of code.
     """
-    explanation = explain_code(req.code, language=req.language)
+    explanation = await _run_scheduled(
+        x_devmind_user, None, PRIORITY_INTERACTIVE, explain_code, req.code, language=req.language
+    )
     return ExplainResponse(explanation=explanation)
 
 
+@app.get("/api/repo-map", response_model=RepoMapResponse)
+async def repo_map(repo_id: str, path: Optional[str] = Query(None, description="Limit to files under this path")):
+    """
+    Precomputed repository structure (no embedding or LLM calls).
+    """
+    if not repo_map_store:
+        raise HTTPException(status_code=503, detail="Repo map store not initialized")
+    repo_map = repo_map_store.load(repo_id)
+    if repo_map is None:
+        raise HTTPException(status_code=404, detail="No repo map for this repo; ingest it first")
+    if path:
+        repo_map = subset(repo_map, path)
+    return RepoMapResponse(**repo_map)
+
+
 @app.post("/api/generate-docs", response_model=GenerateDocsResponse)
-async def generate_docs_endpoint(req: GenerateDocsRequest):
+async def generate_docs_endpoint(req: GenerateDocsRequest, x_devmind_user: Optional[str] = Header(None)):
     """
     Generate documentation from ingested codebase.
-    Uses a broad query to retrieve diverse chunks.
+    Seeds context from the repo map's representative files; falls back to a
+    broad query for repos ingested before repo maps existed.
     """
     if not chroma_client:
         raise HTTPException(status_code=503, detail="Chroma not initialized")
 
-    chunks = chroma_client.query(
-        "main components functions classes modules structure",
-        repo_id=req.repo_id,
-        n_results=10,
-    )
-    documentation = generate_docs(chunks, repo_id=req.repo_id)
+    return await _run_scheduled(x_devmind_user, req.repo_id, PRIORITY_BULK, _generate_docs, req)
+
+
+def _generate_docs(req: GenerateDocsRequest) -> GenerateDocsResponse:
+    """Blocking part of /api/generate-docs, run in the threadpool."""
+    chunks: List[dict] = []
+    structure = None
+    repo_map = repo_map_store.load(req.repo_id) if req.repo_id and repo_map_store else None
+    if repo_map:
+        seeds = representative_files(repo_map, limit=DOCS_SEED_FILES)
+        # First chunk of each file: imports, module docstring and leading definitions
+        chunks = chroma_client.get_chunks([f"{req.repo_id}::{p}::0" for p in seeds])
+        outline_files = None
+        if len(repo_map["files"]) > DOCS_STRUCTURE_MAX_FILES:
+            outline_files = representative_files(repo_map, limit=DOCS_STRUCTURE_MAX_FILES)
+        structure = format_structure(repo_map, outline_files)
+    if not chunks:
+        chunks = chroma_client.query(
+            "main components functions classes modules structure",
+            repo_id=req.repo_id,
+            n_results=10,
+        )
+    documentation = generate_docs(chunks, repo_id=req.repo_id, structure=structure)
     return GenerateDocsResponse(documentation=documentation)
@@ -10,6 +10,7 @@ from chromadb.config import Settings
 
 from .embeddings import EmbeddingGenerator
 from .chunker import chunk_code
+from .concurrency import SingleFlight
 
 
 class ChromaClient:
@@ -35,6 +36,8 @@ class ChromaClient:
         self.collection_name = collection_name
         self.embedder = EmbeddingGenerator()
         self._collection = None
+        # Identical concurrent queries share one embed + search
+        self._query_flight = SingleFlight()
 
     def _get_collection(self):
         """Get or create the collection."""
@@ -50,14 +53,18 @@ class ChromaClient:
         repo_id: str,
         file_path: str,
         content: str,
+        start_line: int = 1,
+        byte_offset: int = 0,
     ) -> int:
         """
-        Chunk, embed, and add a single file to Chroma.
+        Chunk, embed, and add a single file (or one window of a large file) to Chroma.
 
         Args:
             repo_id: Unique repo identifier (e.g. owner/repo)
             file_path: Relative path within repo
             content: File content
+            start_line: Line number of content's first line within the file
+            byte_offset: Byte offset of content within the file (unique per window)
 
         Returns:
             Number of chunks added
@@ -71,13 +78,15 @@ class ChromaClient:
             {
                 "repo_id": repo_id,
                 "file_path": c[1]["file_path"],
-                "start_line": str(c[1]["start_line"]),
-                "end_line": str(c[1]["end_line"]),
+                "start_line": str(c[1]["start_line"] + start_line - 1),
+                "end_line": str(c[1]["end_line"] + start_line - 1),
             }
             for c in chunks
         ]
         embeddings = self.embedder.embed_documents(texts)
-        ids = [f"{repo_id}::{file_path}::{i}" for i in range(len(texts))]
+        # Later windows of a large file get their own id prefix
+        prefix = f"{repo_id}::{file_path}" if byte_offset == 0 else f"{repo_id}::{file_path}@{byte_offset}"
+        ids = [f"{prefix}::{i}" for i in range(len(texts))]
 
         # ChromaDB max batch size ~5461 - add in smaller batches
         BATCH_SIZE = 4000
@@ -113,8 +122,14 @@ class ChromaClient:
             n_results: Number of chunks to return
 
         Returns:
-            List of {content, metadata} dicts
+            List of {id, content, metadata} dicts
         """
+        key = (query_text, repo_id, n_results)
+        # Copy: coalesced callers must not see each other's list mutations
+        return list(self._query_flight.do(key, self._query, query_text, repo_id, n_results))
+
+    def _query(self, query_text: str, repo_id: Optional[str], n_results: int) -> List[dict]:
+        """Embed query_text and run the similarity search."""
         coll = self._get_collection()
         query_embedding = self.embedder.embed_query(query_text)
         where = {"repo_id": repo_id} if repo_id else None
@@ -125,8 +140,29 @@ class ChromaClient:
             include=["documents", "metadatas"],
         )
         out = []
+        ids = results["ids"][0] if results["ids"] else []
         docs = results["documents"][0] if results["documents"] else []
         metas = results["metadatas"][0] if results["metadatas"] else []
-        for d, m in zip(docs, metas):
-            out.append({"content": d, "metadata": m or {}})
+        for i, d, m in zip(ids, docs, metas):
+            out.append({"id": i, "content": d, "metadata": m or {}})
         return out
+
+    def get_chunks(self, ids: List[str]) -> List[dict]:
+        """
+        Fetch stored chunks by id (no embedding or similarity search).
+
+        Args:
+            ids: Chunk ids as returned by query()
+
+        Returns:
+            List of {id, content, metadata} dicts in the order of ids;
+            ids no longer in the collection are skipped
+        """
+        if not ids:
+            return []
+        coll = self._get_collection()
+        results = coll.get(ids=ids, include=["documents", "metadatas"])
+        found = {}
+        for i, d, m in zip(results["ids"], results["documents"] or [], results["metadatas"] or []):
+            found[i] = {"id": i, "content": d, "metadata": m or {}}
+        return [found[i] for i in ids if i in found]
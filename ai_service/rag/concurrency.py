@@ -0,0 +1,207 @@
+"""
+DevMind - Request coalescing and per-tenant rate limiting.
+SingleFlight shares one in-flight call between identical concurrent callers;
+RequestScheduler meters requests per tenant; PriorityLimiter bounds
+concurrent upstream calls, interactive requests first.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+# Priority of the request the current worker thread is serving
+current_priority: contextvars.ContextVar = contextvars.ContextVar(
+    "current_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+class RateLimited(Exception):
+    """Raised when a request cannot be scheduled within the wait limit."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Thread-safe: callers with the same key while one call is running get its result."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs), or wait for the identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class TokenBucket:
+    """Classic token bucket: refills at rate tokens/sec up to capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, reserve: float = 0.0) -> float:
+        """
+        Take one token if that leaves at least `reserve` in the bucket.
+
+        Returns:
+            0 on success, otherwise seconds until a token would be available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens - 1 >= reserve:
+            self.tokens -= 1
+            return 0.0
+        return (1 + reserve - self.tokens) / self.rate
+
+
+class RequestScheduler:
+    """
+    Per-tenant token buckets. Bulk requests may only spend a tenant's tokens
+    down to a reserve, which is kept for interactive requests. Requests that
+    would wait longer than max_wait for a token are rejected with RateLimited.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = 30.0,
+        burst: float = 10.0,
+        max_wait: float = 10.0,
+        bulk_reserve: float = 0.5,
+        max_tenants: int = 10000,
+    ):
+        """
+        Args:
+            rate_per_minute: Sustained requests per tenant
+            burst: Bucket capacity per tenant
+            max_wait: Max seconds a request may wait for a token
+            bulk_reserve: Fraction of a tenant's bucket bulk requests cannot use
+            max_tenants: Buckets kept in memory (least recently used are dropped)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_wait = max_wait
+        self.bulk_reserve = burst * bulk_reserve
+        self.max_tenants = max_tenants
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, tenant: str) -> TokenBucket:
+        bucket = self._buckets.get(tenant)
+        if bucket is None:
+            bucket = self._buckets[tenant] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_tenants:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(tenant)
+        return bucket
+
+    async def acquire(self, tenant: str, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Wait for a tenant token; raises RateLimited past max_wait."""
+        deadline = time.monotonic() + self.max_wait
+        reserve = self.bulk_reserve if priority >= PRIORITY_BULK else 0.0
+        bucket = self._bucket(tenant)
+        while True:
+            wait = bucket.take(reserve)
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(wait)
+            await asyncio.sleep(wait)
+
+
+class PriorityLimiter:
+    """
+    Thread-safe cap on concurrent upstream calls. Waiters are admitted in
+    priority order (then arrival order); a waiter gives up after its timeout.
+    """
+
+    def __init__(self, max_concurrent: int = 4):
+        self.max_concurrent = max_concurrent
+        self._active = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+    def acquire(self, priority: int, timeout: float) -> bool:
+        """Take a slot; False if none was free within timeout."""
+        deadline = time.monotonic() + timeout
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            while self._active >= self.max_concurrent or self._waiting[0] != entry:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiting)
+            self._active += 1
+            # The next waiter may fit too
+            self._cond.notify_all()
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int, timeout: float):
+        """with limiter.slot(priority, timeout): ... (raises RateLimited on timeout)"""
+        if not self.acquire(priority, timeout):
+            raise RateLimited(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def run_with_priority(priority: int, fn: Callable, *args, **kwargs) -> Any:
+    """Run fn with current_priority set, for use as a threadpool target."""
+    token = current_priority.set(priority)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        current_priority.reset(token)
@@ -10,6 +10,8 @@ from typing import List, Optional
 
 import httpx
 
+from .concurrency import PriorityLimiter, RateLimited, SingleFlight, current_priority
+
 # Ensure .env is loaded (in case this module is imported before main loads it)
 _env_path = Path(__file__).resolve().parent.parent.parent / ".env"
 if _env_path.exists():
@@ -19,8 +21,28 @@ if _env_path.exists():
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama2")
 
+# Concurrent upstream LLM calls, and how long a call may queue for one
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+
+# Identical prompts already in flight share one upstream request; only the
+# leader of a flight takes a concurrency slot, so followers never queue
+_llm_flight = SingleFlight()
+_llm_limiter = PriorityLimiter(LLM_MAX_CONCURRENCY)
+
 
 def _call_llm(prompt: str, max_tokens: int = 1024) -> Optional[str]:
+    """Call LLM, coalescing concurrent identical prompts. Raises RateLimited if no slot frees up."""
+    return _llm_flight.do((prompt, max_tokens), _call_llm_limited, prompt, max_tokens)
+
+
+def _call_llm_limited(prompt: str, max_tokens: int) -> Optional[str]:
+    """Upstream call under the concurrency cap, in the current request's priority."""
+    with _llm_limiter.slot(current_priority.get(), timeout=LLM_MAX_WAIT):
+        return _call_llm_upstream(prompt, max_tokens)
+
+
+def _call_llm_upstream(prompt: str, max_tokens: int = 1024) -> Optional[str]:
     """Call LLM: Groq first (free), then Ollama if no key."""
     api_key = (os.getenv("GROQ_API_KEY") or "").strip().strip('"').strip("'")
     if api_key and len(api_key) > 20:
@@ -68,19 +90,21 @@ def answer_question(
     question: str,
     context_chunks: List[dict],
     repo_id: Optional[str] = None,
+    history: Optional[str] = None,
 ) -> str:
-    """RAG question answering over codebase."""
+    """RAG question answering over codebase. history: prior turns of a chat session."""
     if not context_chunks:
         return (
             "No codebase has been ingested yet. Please ingest a GitHub repository first, then ask questions.\n\n"
             "**To enable AI answers:** Add a free Groq API key to your .env file. Get one at https://console.groq.com"
         )
     context = _format_context(context_chunks)
+    conversation = f"\nCONVERSATION SO FAR:\n{history}\n" if history else ""
     prompt = f"""You are DevMind, an AI assistant for developers. Answer the question based ONLY on the provided code. Be concise and helpful.
 
 CODE:
 {context}
-
+{conversation}
 QUESTION: {question}
 
 Answer in 2-4 short paragraphs. If the code doesn't contain relevant info, say so clearly."""
@@ -93,6 +117,29 @@ Answer in 2-4 short paragraphs. If the code doesn't contain relevant info, say s
     return _fallback_overview(context_chunks, question)
 
 
+def condense_history(summary: str, turns: List[dict]) -> str:
+    """Fold older chat turns into the running session summary."""
+    transcript = "\n\n".join(f"User: {t['question']}\nDevMind: {t['answer']}" for t in turns)
+    prompt = f"""Summarize this conversation about a codebase in at most 5 sentences. Keep file names, function names and conclusions the user may refer back to.
+
+EARLIER SUMMARY:
+{summary or "(none)"}
+
+NEW TURNS:
+{transcript}"""
+
+    try:
+        response = _call_llm(prompt, max_tokens=300)
+    except RateLimited:
+        # The answer is already generated; don't fail the turn over its summary
+        response = None
+    if response:
+        return response
+    # Fallback: keep only the questions asked
+    asked = "; ".join(t["question"] for t in turns)
+    return f"{summary} Earlier questions: {asked}".strip()[-1500:]
+
+
 def _fallback_overview(chunks: List[dict], question: str) -> str:
     """Generate a structured overview from chunks when no LLM."""
     files = {}
@@ -160,21 +207,23 @@ def _fallback_explain(code: str, language: str) -> str:
 def generate_docs(
     chunks: List[dict],
     repo_id: Optional[str] = None,
+    structure: Optional[str] = None,
 ) -> str:
-    """Generate documentation from codebase chunks."""
+    """Generate documentation from codebase chunks. structure: file/symbol outline from the repo map."""
     if not chunks:
         return (
             "No codebase ingested. Ingest a GitHub repository first.\n\n"
             "**To enable AI docs:** Add GROQ_API_KEY to .env (free at https://console.groq.com)"
         )
     context = _format_context(chunks)
+    outline = f"\nFILES AND SYMBOLS:\n{structure}\n" if structure else ""
     prompt = f"""Generate documentation for this codebase. Use this structure:
 
 1. **Overview** — What the project does (2-3 sentences)
 2. **Main components** — List files/modules and their roles
 3. **Key functions** — Important functions and what they do
 4. **Usage** — How to run or use it (if apparent)
-
+{outline}
 CODE:
 {context}
 
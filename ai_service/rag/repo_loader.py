@@ -4,10 +4,12 @@ Uses subprocess for git clone. Loads code files including Jupyter notebooks.
 """
 
 import json
+import mmap
 import os
+import re
 import subprocess
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, TextIO, Tuple
 
 # Extensions to load (code + notebooks; no .json data files)
 SOURCE_EXTENSIONS = {".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".ipynb"}
@@ -15,6 +17,16 @@ SOURCE_EXTENSIONS = {".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".ipy
 # Directories to skip
 SKIP_DIRS = {".git", "node_modules", "__pycache__", "venv", ".venv", "dist", "build"}
 
+# Files above this are read in line-aligned memory-mapped windows instead of all at once
+LARGE_FILE_BYTES = 500 * 1024
+WINDOW_BYTES = 256 * 1024
+
+# Hard ceiling for non-notebook files (datasets, generated bundles)
+MAX_FILE_BYTES = 50 * 1024 * 1024
+
+# Characters read per refill by the streaming notebook parser
+NOTEBOOK_READ_CHARS = 1 << 20
+
 
 def clone_repo(repo_url: str, target_dir: str, branch: Optional[str] = None) -> str:
     """
@@ -37,17 +49,18 @@ def clone_repo(repo_url: str, target_dir: str, branch: Optional[str] = None) ->
     return os.path.abspath(target_dir)
 
 
-def load_source_files(repo_root: str) -> List[Tuple[str, str]]:
+def load_source_files(repo_root: str) -> Iterator[Tuple[str, str, int, int]]:
     """
     Recursively load all relevant source files from repo.
+    Large files are yielded as several windows, one after another.
 
     Args:
         repo_root: Path to repo root
 
-    Returns:
-        List of (relative_file_path, content) tuples
+    Yields:
+        (relative_file_path, content, start_line, byte_offset) tuples;
+        start_line is 1 and byte_offset 0 except for later windows of a large file
     """
-    files: List[Tuple[str, str]] = []
     root_path = Path(repo_root)
 
     for path in root_path.rglob("*"):
@@ -56,38 +69,243 @@ def load_source_files(repo_root: str) -> List[Tuple[str, str]]:
         # Skip excluded directories
         if any(part in SKIP_DIRS for part in path.parts):
             continue
-        if path.suffix.lower() not in SOURCE_EXTENSIONS:
+        suffix = path.suffix.lower()
+        if suffix not in SOURCE_EXTENSIONS:
             continue
-        # Skip files > 500KB (datasets, minified bundles) - would create too many chunks
-        if path.stat().st_size > 500 * 1024:
+        size = path.stat().st_size
+        if suffix != ".ipynb" and size > MAX_FILE_BYTES:
             continue
+        # Forward slashes on every OS: chunk ids and the repo map share this path
+        rel_path = path.relative_to(root_path).as_posix()
         try:
-            rel_path = str(path.relative_to(root_path))
-            if path.suffix.lower() == ".ipynb":
+            if suffix == ".ipynb":
                 content = _load_notebook(path)
+                if content:
+                    yield rel_path, content, 1, 0
+            elif size > LARGE_FILE_BYTES:
+                for content, start_line, offset in _iter_file_windows(path, WINDOW_BYTES):
+                    if content.strip():
+                        yield rel_path, content, start_line, offset
             else:
                 content = path.read_text(encoding="utf-8", errors="replace")
-            if content:
-                files.append((rel_path, content))
+                if content:
+                    yield rel_path, content, 1, 0
         except Exception:
             continue
 
-    return files
+
+def _iter_file_windows(path: Path, window_bytes: int = WINDOW_BYTES) -> Iterator[Tuple[str, int, int]]:
+    """
+    Read a large file through mmap in windows that end on a line boundary.
+    A line longer than the window (minified code) is cut on a UTF-8
+    character boundary and continues in the next window.
+
+    Yields:
+        (window_text, start_line, byte_offset) tuples; a trailing newline is
+        dropped from window_text
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        pos = 0
+        line = 1
+        while pos < size:
+            end = min(pos + window_bytes, size)
+            if end < size:
+                nl = mm.rfind(b"\n", pos, end)
+                if nl >= pos:
+                    end = nl + 1
+                else:
+                    # Don't split a multi-byte character (continuation bytes are 10xxxxxx)
+                    while end > pos + 1 and mm[end] & 0xC0 == 0x80:
+                        end -= 1
+            raw = mm[pos:end]
+            text = raw.decode("utf-8", errors="replace")
+            if text.endswith("\n"):
+                text = text[:-1]
+            yield text, line, pos
+            line += raw.count(b"\n")
+            pos = end
 
 
 def _load_notebook(path: Path) -> str:
-    """Extract code from Jupyter notebook (.ipynb)."""
+    """Extract code from Jupyter notebook (.ipynb) without loading outputs."""
     try:
-        data = json.loads(path.read_text(encoding="utf-8", errors="replace"))
-        cells = data.get("cells", [])
-        code_parts = []
-        for cell in cells:
-            if cell.get("cell_type") == "code":
-                source = cell.get("source", [])
-                if isinstance(source, list):
-                    code_parts.append("".join(source))
-                else:
-                    code_parts.append(str(source))
+        with open(path, encoding="utf-8", errors="replace") as f:
+            code_parts = list(_iter_notebook_code_cells(_JsonStream(f)))
         return "\n\n# --- Next cell ---\n\n".join(code_parts) if code_parts else ""
     except Exception:
         return ""
+
+
+def _iter_notebook_code_cells(stream: "_JsonStream") -> Iterator[str]:
+    """Yield the source of each code cell; every other value is skipped unparsed."""
+    for key in stream.iter_object():
+        if key != "cells":
+            stream.skip_value()
+            continue
+        for _ in stream.iter_array():
+            cell_type = None
+            source: List[str] = []
+            for cell_key in stream.iter_object():
+                if cell_key == "cell_type":
+                    cell_type = stream.read_string()
+                elif cell_key == "source":
+                    source = stream.read_source()
+                else:
+                    stream.skip_value()
+            if cell_type == "code":
+                yield "".join(source)
+
+
+class _JsonStream:
+    """
+    Minimal pull parser over a text file, read in fixed-size windows.
+    Only the values asked for are decoded; skipped strings (e.g. base64
+    image outputs) are scanned but never held in memory as a whole.
+    """
+
+    _STRING_SPECIAL = re.compile(r'["\\]')
+    _CONTAINER_SPECIAL = re.compile(r'["\[\]{}]')
+    _SCALAR = re.compile(r'[^\s,\]}]+')
+    _WS = re.compile(r"\s*")
+
+    def __init__(self, f: TextIO, read_chars: int = NOTEBOOK_READ_CHARS):
+        self.f = f
+        self.read_chars = read_chars
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        """Drop consumed text and append the next window. False at EOF."""
+        data = self.f.read(self.read_chars)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace char without consuming it ("" at EOF)."""
+        while True:
+            self.pos = self._WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield each key of an object; the caller must consume its value."""
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self._expect(":")
+            yield key
+            c = self._peek()
+            self.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise ValueError(f"Malformed object at offset {self.pos}")
+
+    def iter_array(self) -> Iterator[None]:
+        """Yield once per array element; the caller must consume it."""
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            c = self._peek()
+            self.pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError(f"Malformed array at offset {self.pos}")
+
+    def read_string(self) -> str:
+        """Decode the next value as a JSON string."""
+        raw = self._scan_string(keep=True)
+        return json.loads(f'"{raw}"')
+
+    def read_source(self) -> List[str]:
+        """Read a cell source: a string or a list of strings."""
+        if self._peek() == '"':
+            return [self.read_string()]
+        parts = []
+        for _ in self.iter_array():
+            if self._peek() == '"':
+                parts.append(self.read_string())
+            else:
+                self.skip_value()
+        return parts
+
+    def skip_value(self) -> None:
+        """Consume the next value without building it."""
+        c = self._peek()
+        if c == '"':
+            self._scan_string(keep=False)
+        elif c in "{[":
+            self._skip_container()
+        elif c:
+            self._skip_scalar()
+        else:
+            raise ValueError("Unexpected end of JSON")
+
+    def _scan_string(self, keep: bool) -> str:
+        """Consume a string literal; return its raw (still escaped) body if keep."""
+        self._expect('"')
+        parts: List[str] = []
+        start = self.pos
+        while True:
+            m = self._STRING_SPECIAL.search(self.buf, self.pos)
+            if m and m.group() == '"':
+                if keep:
+                    parts.append(self.buf[start:m.start()])
+                self.pos = m.end()
+                return "".join(parts)
+            if m and m.end() < len(self.buf):
+                # Escape sequence: skip the backslash and the escaped char
+                self.pos = m.end() + 1
+                continue
+            # Need more input; keep a trailing backslash with its escaped char
+            cut = m.start() if m else len(self.buf)
+            if keep:
+                parts.append(self.buf[start:cut])
+            self.pos = cut
+            if not self._fill():
+                raise ValueError("Unterminated string")
+            start = self.pos
+
+    def _skip_container(self) -> None:
+        depth = 0
+        while True:
+            m = self._CONTAINER_SPECIAL.search(self.buf, self.pos)
+            if not m:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("Unterminated container")
+                continue
+            c = m.group()
+            if c == '"':
+                self.pos = m.start()
+                self._scan_string(keep=False)
+                continue
+            self.pos = m.end()
+            depth += 1 if c in "{[" else -1
+            if depth == 0:
+                return
+
+    def _skip_scalar(self) -> None:
+        while True:
+            m = self._SCALAR.match(self.buf, self.pos)
+            self.pos = m.end() if m else self.pos
+            if self.pos < len(self.buf) or not self._fill():
+                return
@@ -0,0 +1,308 @@
+"""
+DevMind - Repository map built at ingest time.
+File tree, per-file symbols with line ranges, import graph and size stats,
+persisted as JSON per repo_id for structure queries and doc seeding.
+"""
+
+import ast
+import json
+import os
+import posixpath
+import re
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+# Entry points are favoured when picking representative files for docs
+ENTRY_POINT_NAMES = {"main.py", "app.py", "__main__.py", "manage.py", "server.js", "app.js", "index.js", "main.js", "index.ts", "main.ts", "App.jsx", "App.tsx", "main.jsx", "main.tsx"}
+
+_PY_DEF = re.compile(r"^([ \t]*)(?:async\s+)?(def|class)\s+(\w+)", re.MULTILINE)
+_PY_IMPORT = re.compile(r"^\s*(?:from\s+(\.*[\w.]*)\s+import|import\s+([\w.]+))", re.MULTILINE)
+_JS_DEF = re.compile(
+    r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:async\s+)?"
+    r"(?:(function)\s*\*?\s*(\w+)|(class)\s+(\w+)|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>))",
+    re.MULTILINE,
+)
+_JS_IMPORT = re.compile(r"""(?:import\s[^'"]*?from\s*|import\s*|require\s*\(\s*)['"]([^'"]+)['"]""")
+_JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+
+
+class RepoMapBuilder:
+    """Accumulates files during ingest and produces the repo map."""
+
+    def __init__(self, repo_id: str):
+        self.repo_id = repo_id
+        self._files: Dict[str, dict] = {}
+        self._raw_imports: Dict[str, List[str]] = {}
+
+    def add_file(self, file_path: str, content: str, start_line: int = 1) -> None:
+        """
+        Record one file, or one window of a large file.
+
+        Args:
+            file_path: Relative path within repo
+            content: File content (or window content)
+            start_line: Line number of content's first line within the file
+        """
+        path = file_path.replace("\\", "/")
+        entry = self._files.setdefault(path, {"lines": 0, "bytes": 0, "symbols": []})
+        # Windows may continue a line from the previous one, so track the last line seen
+        if content:
+            entry["lines"] = max(entry["lines"], _last_line(content, start_line))
+        entry["bytes"] += len(content.encode("utf-8", errors="replace"))
+        ext = posixpath.splitext(path)[1].lower()
+        if ext == ".py":
+            symbols, imports = _python_symbols(content, start_line)
+        elif ext in _JS_EXTENSIONS:
+            symbols, imports = _js_symbols(content, start_line)
+        else:
+            return
+        entry["symbols"].extend(symbols)
+        self._raw_imports.setdefault(path, []).extend(imports)
+
+    def build(self) -> dict:
+        """Resolve imports against repo files and assemble the map."""
+        paths = sorted(self._files)
+        known = set(paths)
+        imports: Dict[str, List[str]] = {}
+        imported_by: Dict[str, int] = {}
+        for path, raw in self._raw_imports.items():
+            resolved = sorted({t for t in (_resolve_import(path, r, known) for r in raw) if t and t != path})
+            if resolved:
+                imports[path] = resolved
+                for target in resolved:
+                    imported_by[target] = imported_by.get(target, 0) + 1
+
+        files = {p: {**self._files[p], "imported_by": imported_by.get(p, 0)} for p in paths}
+        return {
+            "repo_id": self.repo_id,
+            "tree": _build_tree(paths),
+            "files": files,
+            "imports": imports,
+            "stats": _stats(files),
+        }
+
+
+class RepoMapStore:
+    """Persists repo maps as JSON files, with an in-memory cache for reads."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._cache: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, repo_id: str) -> str:
+        return os.path.join(self.directory, quote(repo_id, safe="") + ".json")
+
+    def save(self, repo_map: dict) -> None:
+        """Write a map, replacing any earlier one for the same repo."""
+        repo_id = repo_map["repo_id"]
+        path = self._path(repo_id)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(repo_map, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._cache[repo_id] = repo_map
+
+    def load(self, repo_id: str) -> Optional[dict]:
+        """Return the map for repo_id, or None if it was never built."""
+        with self._lock:
+            if repo_id in self._cache:
+                return self._cache[repo_id]
+        path = self._path(repo_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            repo_map = json.load(f)
+        with self._lock:
+            self._cache[repo_id] = repo_map
+        return repo_map
+
+
+def subset(repo_map: dict, prefix: str) -> dict:
+    """Restrict a map to files under a directory or path prefix."""
+    prefix = prefix.replace("\\", "/").strip("/")
+    files = {
+        p: info for p, info in repo_map.get("files", {}).items()
+        if p == prefix or p.startswith(prefix + "/")
+    }
+    return {
+        **repo_map,
+        "tree": _build_tree(sorted(files)),
+        "files": files,
+        "imports": {p: t for p, t in repo_map.get("imports", {}).items() if p in files},
+        "stats": _stats(files),
+    }
+
+
+def representative_files(repo_map: dict, limit: int = 10, per_dir: int = 3) -> List[str]:
+    """
+    Pick files that best describe the repo: widely imported, symbol-rich,
+    or entry points, spread across directories.
+    """
+    def score(item):
+        path, info = item
+        name = posixpath.basename(path)
+        return (
+            2 * info.get("imported_by", 0)
+            + min(len(info.get("symbols", [])), 20)
+            + (10 if name in ENTRY_POINT_NAMES else 0)
+        )
+
+    ranked = sorted(repo_map.get("files", {}).items(), key=score, reverse=True)
+    picked: List[str] = []
+    dir_counts: Dict[str, int] = {}
+    for path, info in ranked:
+        if not info.get("symbols") and posixpath.basename(path) not in ENTRY_POINT_NAMES:
+            continue
+        d = posixpath.dirname(path)
+        if dir_counts.get(d, 0) >= per_dir:
+            continue
+        dir_counts[d] = dir_counts.get(d, 0) + 1
+        picked.append(path)
+        if len(picked) >= limit:
+            break
+    return picked
+
+
+def format_structure(repo_map: dict, files: Optional[List[str]] = None, max_symbols: int = 15) -> str:
+    """Compact text outline of files and their top-level symbols, for prompts."""
+    lines = []
+    for path in files or sorted(repo_map.get("files", {})):
+        info = repo_map["files"].get(path, {})
+        names = [s["name"] for s in info.get("symbols", []) if "." not in s["name"]]
+        more = f", +{len(names) - max_symbols} more" if len(names) > max_symbols else ""
+        suffix = f": {', '.join(names[:max_symbols])}{more}" if names else ""
+        lines.append(f"- {path} ({info.get('lines', 0)} lines){suffix}")
+    return "\n".join(lines)
+
+
+def _python_symbols(content: str, start_line: int):
+    """Symbols and imported module names from Python source."""
+    offset = start_line - 1
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        # Windows of large files may not parse on their own
+        return _regex_symbols(_PY_DEF, content, offset, kind_groups=(2,), name_groups=(3,)), [
+            m.group(1) or m.group(2) for m in _PY_IMPORT.finditer(content)
+        ]
+
+    symbols = []
+
+    def visit(node, prefix=""):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{prefix}{child.name}"
+                symbols.append({
+                    "name": name,
+                    "kind": "class" if isinstance(child, ast.ClassDef) else "function",
+                    "start_line": child.lineno + offset,
+                    "end_line": getattr(child, "end_lineno", child.lineno) + offset,
+                })
+                if isinstance(child, ast.ClassDef):
+                    visit(child, prefix=f"{name}.")
+
+    visit(tree)
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            imports.append(module)
+            # "from . import x" / "from pkg import sub" may name modules
+            imports.extend(f"{module}.{a.name}" if node.module else module + a.name for a in node.names)
+    return symbols, imports
+
+
+def _js_symbols(content: str, start_line: int):
+    """Symbols and import specifiers from JS/TS source (regex based)."""
+    symbols = _regex_symbols(_JS_DEF, content, start_line - 1, kind_groups=(1, 3), name_groups=(2, 4, 5))
+    imports = [m.group(1) for m in _JS_IMPORT.finditer(content)]
+    return symbols, imports
+
+
+def _regex_symbols(pattern, content: str, offset: int, kind_groups, name_groups) -> List[dict]:
+    """Top-level symbols by regex; a symbol ends where the next one starts."""
+    matches = []
+    for m in pattern.finditer(content):
+        indent = m.group(0)[: len(m.group(0)) - len(m.group(0).lstrip())]
+        if indent:
+            continue
+        kind = next((m.group(g) for g in kind_groups if m.group(g)), None)
+        name = next(m.group(g) for g in name_groups if m.group(g))
+        line = content.count("\n", 0, m.start()) + 1 + offset
+        matches.append((name, "class" if kind == "class" else "function", line))
+    total = _last_line(content, offset + 1)
+    symbols = []
+    for i, (name, kind, line) in enumerate(matches):
+        end = matches[i + 1][2] - 1 if i + 1 < len(matches) else total
+        symbols.append({"name": name, "kind": kind, "start_line": line, "end_line": max(line, end)})
+    return symbols
+
+
+def _last_line(content: str, start_line: int) -> int:
+    """Line number of content's last line; a trailing newline does not start a new one."""
+    return start_line + content.count("\n") - (1 if content.endswith("\n") else 0)
+
+
+def _resolve_import(source: str, spec: str, known: set) -> Optional[str]:
+    """Map an import to a file in the repo, or None for external modules."""
+    base = posixpath.dirname(source)
+    if source.endswith(".py"):
+        level = len(spec) - len(spec.lstrip("."))
+        module = spec.lstrip(".").replace(".", "/")
+        if level:
+            for _ in range(level - 1):
+                base = posixpath.dirname(base)
+            roots = [base]
+        else:
+            # Absolute imports: try the repo root and the importing file's directory
+            roots = ["", base]
+        for root in roots:
+            stem = posixpath.join(root, module) if module else root
+            for candidate in (stem + ".py", posixpath.join(stem, "__init__.py")):
+                candidate = candidate.lstrip("/")
+                if candidate in known:
+                    return candidate
+        return None
+    if not spec.startswith("."):
+        return None
+    stem = posixpath.normpath(posixpath.join(base, spec))
+    for candidate in [stem] + [stem + e for e in _JS_EXTENSIONS] + [posixpath.join(stem, "index" + e) for e in _JS_EXTENSIONS]:
+        if candidate in known:
+            return candidate
+    return None
+
+
+def _stats(files: Dict[str, dict]) -> dict:
+    """Totals and per-extension line/byte counts for a set of files."""
+    by_extension: Dict[str, dict] = {}
+    for path, info in files.items():
+        ext = posixpath.splitext(path)[1].lower() or "(none)"
+        stat = by_extension.setdefault(ext, {"files": 0, "lines": 0, "bytes": 0})
+        stat["files"] += 1
+        stat["lines"] += info["lines"]
+        stat["bytes"] += info["bytes"]
+    return {
+        "files": len(files),
+        "lines": sum(f["lines"] for f in files.values()),
+        "bytes": sum(f["bytes"] for f in files.values()),
+        "symbols": sum(len(f["symbols"]) for f in files.values()),
+        "by_extension": dict(sorted(by_extension.items())),
+    }
+
+
+def _build_tree(paths: List[str]) -> dict:
+    """Nested {name: subtree} dict; files map to None."""
+    tree: dict = {}
+    for path in paths:
+        node = tree
+        parts = path.split("/")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = None
+    return tree
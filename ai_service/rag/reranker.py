@@ -0,0 +1,96 @@
+"""
+DevMind - Retrieval reranking using a small local cross-encoder.
+Scores over-fetched vector hits on CPU and keeps the best ones for the LLM.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import List
+
+from sentence_transformers import CrossEncoder
+
+
+class Reranker:
+    """Reorders retrieved code chunks by cross-encoder relevance to the query."""
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        budget_ms: float = 300.0,
+        batch_size: int = 32,
+        max_length: int = 512,
+        max_workers: int = 2,
+    ):
+        """
+        Initialize the cross-encoder model on CPU.
+
+        Args:
+            model_name: HuggingFace cross-encoder model
+            budget_ms: Max time for one scoring pass before falling back to vector order
+            batch_size: Candidates scored per forward pass
+            max_length: Token limit for each (query, chunk) pair
+            max_workers: Concurrent scoring passes (CPU-bound; size to available cores)
+        """
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        # Scoring runs off the request thread so a slow pass can be abandoned
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def warmup(self) -> None:
+        """Run one dummy pass so the first real request doesn't pay model init cost."""
+        self.model.predict([("warmup", "def warmup(): pass")], batch_size=1)
+
+    def rerank(self, query: str, chunks: List[dict], top_k: int = 5) -> List[dict]:
+        """
+        Rerank chunks by relevance to query.
+
+        Args:
+            query: User question
+            chunks: Candidate {content, metadata} dicts in vector order
+            top_k: Number of chunks to return
+
+        Returns:
+            Top-k chunks by cross-encoder score, or the first top_k in vector
+            order if scoring exceeds the latency budget
+        """
+        if len(chunks) <= 1:
+            return chunks[:top_k]
+
+        pairs = [(query, c.get("content", "")) for c in chunks]
+        # One deadline covers queueing and scoring, so a request never waits past the budget
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000.0
+        abandoned = threading.Event()
+
+        def score():
+            # Batch by batch so an abandoned pass frees its worker after at most one batch
+            scores = []
+            for i in range(0, len(pairs), self.batch_size):
+                if abandoned.is_set():
+                    return None
+                batch = pairs[i:i + self.batch_size]
+                scores.extend(self.model.predict(batch, batch_size=self.batch_size, show_progress_bar=False))
+            return scores
+
+        future = self._executor.submit(score)
+        try:
+            scores = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except TimeoutError:
+            abandoned.set()
+            future.cancel()  # Drops the pass if it never started
+            print(
+                f"[DevMind] Rerank exceeded {self.budget_ms:.0f}ms budget, using vector order",
+                flush=True,
+            )
+            return chunks[:top_k]
+        except Exception as e:
+            print(f"[DevMind] Rerank error: {type(e).__name__}: {e}", flush=True)
+            return chunks[:top_k]
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[DevMind] Reranked {len(chunks)} chunks in {elapsed_ms:.0f}ms", flush=True)
+        order = sorted(range(len(chunks)), key=lambda i: float(scores[i]), reverse=True)
+        return [chunks[i] for i in order[:top_k]]
@@ -0,0 +1,142 @@
+"""
+DevMind - In-memory chat sessions for multi-turn /api/ask.
+Keeps recent turns, their retrieved chunk ids and a condensed summary server-side.
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+# Words that don't identify code; a follow-up made only of these is about the current context
+_STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "has", "have", "had", "can", "could", "would",
+    "should", "does", "did", "doing", "done", "what", "which", "who", "whom", "why", "how",
+    "when", "where", "this", "that", "these", "those", "there", "here", "its", "with",
+    "without", "from", "into", "about", "then", "than", "also", "more", "less", "some", "any",
+    "all", "each", "other", "same", "just", "only", "not", "but", "you", "your", "please",
+    "explain", "tell", "show", "describe", "mean", "means", "work", "works", "happen",
+    "happens", "used", "use", "uses", "code", "function", "method", "class", "file", "line",
+    "lines", "part", "again", "detail", "details", "example", "instead", "they", "them",
+    "their", "will", "like", "get", "gets", "set", "need", "make", "elaborate",
+}
+_TERM = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+
+class ChatSession:
+    """Conversation state for one chat: recent turns plus a rolling summary."""
+
+    def __init__(self, session_id: str, repo_id: Optional[str] = None):
+        self.session_id = session_id
+        self.repo_id = repo_id
+        self.turns: List[dict] = []  # {question, answer, chunk_ids}
+        self.summary = ""  # Condensed form of turns already dropped from self.turns
+        self.last_access = time.monotonic()
+        self.lock = threading.Lock()  # Held for a whole turn (retrieve, answer, summarize)
+
+    @property
+    def last_chunk_ids(self) -> List[str]:
+        """Chunk ids used to answer the previous turn."""
+        return self.turns[-1]["chunk_ids"] if self.turns else []
+
+    def add_turn(self, question: str, answer: str, chunk_ids: List[str]) -> None:
+        """Record a completed question/answer turn."""
+        self.turns.append({"question": question, "answer": answer, "chunk_ids": chunk_ids})
+
+    def pop_overflow(self, keep_recent: int, condense_batch: int) -> List[dict]:
+        """
+        Remove and return the oldest turns once enough have piled up past keep_recent.
+
+        Turns are released in batches so the summary is rebuilt once per
+        condense_batch turns instead of on every turn.
+        """
+        overflow = len(self.turns) - keep_recent
+        if overflow < condense_batch:
+            return []
+        old, self.turns = self.turns[:overflow], self.turns[overflow:]
+        return old
+
+    def history_prompt(self, max_answer_chars: int = 400) -> str:
+        """Format summary and recent turns for the LLM prompt."""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation: {self.summary}")
+        for t in self.turns:
+            answer = t["answer"]
+            if len(answer) > max_answer_chars:
+                answer = answer[:max_answer_chars] + "..."
+            parts.append(f"User: {t['question']}\nDevMind: {answer}")
+        return "\n\n".join(parts)
+
+
+def covered_by(question: str, chunks: List[dict]) -> bool:
+    """
+    True if every identifying term in a follow-up question appears in the
+    chunks already in context (e.g. "why does it retry?" after a turn about
+    retry logic), so a new vector search would add little.
+    """
+    terms = {t.lower() for t in _TERM.findall(question)} - _STOPWORDS
+    if not terms:
+        return True
+    # Whole identifiers only: "main" must not match "domain"
+    known = {t.lower() for c in chunks for t in _TERM.findall(c.get("content", ""))}
+    return terms <= known
+
+
+class SessionStore:
+    """Bounded in-memory session store with TTL and least-recently-used eviction."""
+
+    def __init__(self, max_sessions: int = 500, ttl_seconds: float = 1800.0):
+        """
+        Args:
+            max_sessions: Max live sessions; least recently used are evicted beyond this
+            ttl_seconds: Idle time after which a session expires
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, repo_id: Optional[str] = None) -> ChatSession:
+        """Start a new session."""
+        session = ChatSession(uuid.uuid4().hex, repo_id=repo_id)
+        with self._lock:
+            self._evict_expired()
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return a live session and refresh its TTL, or None if unknown/expired."""
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def resume(self, session_id: str, repo_id: Optional[str] = None) -> ChatSession:
+        """Return the live session for this repo, or a fresh one if it expired or targets another repo."""
+        session = self.get(session_id)
+        if session is None or session.repo_id != repo_id:
+            session = self.create(repo_id=repo_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session. Returns True if it existed."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict_expired(self) -> None:
+        """Remove idle sessions (oldest first, stops at the first live one)."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            sid, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            del self._sessions[sid]
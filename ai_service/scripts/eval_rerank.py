@@ -0,0 +1,69 @@
+"""
+DevMind - Rerank evaluation: recall@k and added latency on an ingested repo.
+
+Usage (from ai_service/, after ingesting the benchmark repo):
+    python scripts/eval_rerank.py --repo-id owner/repo --questions eval.jsonl
+
+eval.jsonl holds one {"question": ..., "files": ["path/in/repo.py", ...]} per
+line, listing the files a good answer must draw on. A question counts as a
+hit at k if any of its files is among the top-k chunks.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rag.chroma_client import ChromaClient  # noqa: E402
+from rag.reranker import Reranker  # noqa: E402
+
+
+def _hit(chunks, files) -> bool:
+    paths = {c["metadata"].get("file_path", "").replace("\\", "/") for c in chunks}
+    return any(f in paths for f in files)
+
+
+def main() -> None:
+    default_chroma = os.getenv("CHROMA_PERSIST_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "chroma_db"))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo-id", required=True)
+    parser.add_argument("--questions", required=True, help="JSONL of {question, files}")
+    parser.add_argument("--chroma-dir", default=default_chroma)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=int(os.getenv("RERANK_CANDIDATES", "20")))
+    parser.add_argument("--model", default=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"))
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("RERANK_BUDGET_MS", "300")))
+    args = parser.parse_args()
+
+    with open(args.questions, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    client = ChromaClient(persist_directory=args.chroma_dir)
+    reranker = Reranker(model_name=args.model, budget_ms=args.budget_ms)
+    reranker.warmup()
+
+    vector_hits = rerank_hits = 0
+    added_ms = []
+    for case in cases:
+        candidates = client.query(case["question"], repo_id=args.repo_id, n_results=max(args.candidates, args.top_k))
+        vector_hits += _hit(candidates[:args.top_k], case["files"])
+        start = time.perf_counter()
+        reranked = reranker.rerank(case["question"], candidates, top_k=args.top_k)
+        added_ms.append((time.perf_counter() - start) * 1000)
+        rerank_hits += _hit(reranked, case["files"])
+
+    n = len(cases) or 1
+    print(f"questions: {len(cases)}  top_k: {args.top_k}  candidates: {args.candidates}")
+    print(f"recall@{args.top_k} vector: {vector_hits / n:.3f}")
+    print(f"recall@{args.top_k} rerank: {rerank_hits / n:.3f}  (gain {(rerank_hits - vector_hits) / n:+.3f})")
+    if added_ms:
+        p95 = sorted(added_ms)[max(0, int(len(added_ms) * 0.95) - 1)]
+        print(f"added ms: mean {statistics.mean(added_ms):.1f}  p50 {statistics.median(added_ms):.1f}  p95 {p95:.1f}")
+
+
+if __name__ == "__main__":
+    main()
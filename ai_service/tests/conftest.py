@@ -0,0 +1,8 @@
+"""
+Test setup: make the ai_service package root importable (rag.*), as uvicorn does.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
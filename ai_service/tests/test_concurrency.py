@@ -0,0 +1,121 @@
+"""
+Tests for rag.concurrency: coalescing, the upstream concurrency cap and token buckets.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rag.concurrency import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PriorityLimiter,
+    RateLimited,
+    RequestScheduler,
+    SingleFlight,
+    current_priority,
+    run_with_priority,
+)
+
+
+def test_identical_calls_share_one_upstream_call_and_no_slot():
+    # Same composition as rag_pipeline._call_llm: only the flight leader takes a slot
+    flight = SingleFlight()
+    limiter = PriorityLimiter(max_concurrent=4)
+    calls = []
+
+    def upstream(prompt):
+        calls.append(prompt)
+        time.sleep(0.3)
+        return f"docs for {prompt}"
+
+    def limited(prompt):
+        with limiter.slot(current_priority.get(), timeout=0.5):
+            return upstream(prompt)
+
+    def request(_):
+        return run_with_priority(PRIORITY_BULK, flight.do, "repo", limited, "repo")
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(request, range(20)))
+    assert results == ["docs for repo"] * 20
+    assert calls == ["repo"]
+
+
+def test_flight_results_and_errors_reach_all_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise RateLimited(1.0)
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", fail)
+        except RateLimited as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 5
+    # The failed flight is gone; the next call runs again
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_limiter_admits_interactive_before_bulk():
+    limiter = PriorityLimiter(max_concurrent=1)
+    order = []
+    assert limiter.acquire(PRIORITY_BULK, timeout=1)
+
+    def wait_for_slot(name, priority):
+        with limiter.slot(priority, timeout=2):
+            order.append(name)
+
+    threads = [threading.Thread(target=wait_for_slot, args=("bulk", PRIORITY_BULK))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=wait_for_slot, args=("interactive", PRIORITY_INTERACTIVE)))
+    threads[1].start()
+    time.sleep(0.05)
+    limiter.release()
+    for t in threads:
+        t.join()
+    assert order == ["interactive", "bulk"]
+
+
+def test_limiter_times_out():
+    limiter = PriorityLimiter(max_concurrent=1)
+    assert limiter.acquire(PRIORITY_INTERACTIVE, timeout=1)
+    with pytest.raises(RateLimited):
+        with limiter.slot(PRIORITY_INTERACTIVE, timeout=0.05):
+            pass
+    limiter.release()
+    assert limiter.acquire(PRIORITY_INTERACTIVE, timeout=0.05)
+
+
+def test_bulk_cannot_spend_interactive_reserve():
+    scheduler = RequestScheduler(rate_per_minute=6, burst=4, max_wait=0.5, bulk_reserve=0.5)
+
+    async def take(priority):
+        try:
+            await scheduler.acquire("user:repo", priority)
+            return "ok"
+        except RateLimited:
+            return "429"
+
+    async def run():
+        bulk = [await take(PRIORITY_BULK) for _ in range(3)]
+        interactive = [await take(PRIORITY_INTERACTIVE) for _ in range(3)]
+        return bulk, interactive
+
+    assert asyncio.run(run()) == (["ok", "ok", "429"], ["ok", "ok", "429"])
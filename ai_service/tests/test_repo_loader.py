@@ -0,0 +1,150 @@
+"""
+Tests for rag.repo_loader: streaming notebook parsing and windowed large-file reads.
+"""
+
+import base64
+import json
+import os
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from rag import repo_loader
+from rag.repo_loader import _iter_file_windows, _load_notebook, load_source_files
+
+CELL_SEPARATOR = "\n\n# --- Next cell ---\n\n"
+
+# Size of the large-notebook test; set DEVMIND_TEST_NOTEBOOK_MB=300 for the full-size check
+LARGE_NOTEBOOK_MB = int(os.getenv("DEVMIND_TEST_NOTEBOOK_MB", "16"))
+
+
+def _json_extract(path: Path) -> str:
+    """Reference extraction: what _load_notebook did before streaming."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    parts = []
+    for cell in data["cells"]:
+        if cell.get("cell_type") == "code":
+            source = cell.get("source", [])
+            parts.append("".join(source) if isinstance(source, list) else str(source))
+    return CELL_SEPARATOR.join(parts)
+
+
+def _write_notebook(path: Path, n_cells: int, image_bytes: int) -> str:
+    """Write a notebook with base64 image outputs; return the expected code."""
+    image = base64.b64encode(os.urandom(image_bytes)).decode()
+    cells = []
+    expected = []
+    for i in range(n_cells):
+        source = [f"x{i} = {{'a': \"q\\\\\", 'b': 'é☃😀'}}\n", f"print(x{i})\t# {i}"]
+        cells.append({
+            "cell_type": "code",
+            "execution_count": i,
+            "metadata": {"tags": ["t", None, True, 1.5e3, {"k": "}]\""}]},
+            "outputs": [{
+                "data": {"image/png": image, "text/plain": ["<Figure \"x\" \\ >\n"]},
+                "metadata": {},
+                "output_type": "display_data",
+            }],
+            "source": source,
+        })
+        expected.append("".join(source))
+        cells.append({"cell_type": "markdown", "metadata": {}, "source": f"# Section {i}\n"})
+    cells.append({"cell_type": "code", "metadata": {}, "outputs": [], "source": "single = 'string source'"})
+    expected.append("single = 'string source'")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"cells": cells, "metadata": {"kernelspec": {}}, "nbformat": 4, "nbformat_minor": 5}, f, indent=1)
+    return CELL_SEPARATOR.join(expected)
+
+
+def test_notebook_matches_json_extraction(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    expected = _write_notebook(path, n_cells=20, image_bytes=200_000)
+    assert _load_notebook(path) == _json_extract(path) == expected
+    # Tiny read windows exercise strings, escapes and containers split across refills
+    with open(path, encoding="utf-8") as f:
+        stream = repo_loader._JsonStream(f, read_chars=7)
+        assert CELL_SEPARATOR.join(repo_loader._iter_notebook_code_cells(stream)) == expected
+
+
+def test_malformed_notebook_returns_empty(tmp_path):
+    path = tmp_path / "broken.ipynb"
+    path.write_text('{"cells": [{"cell_type": "code", "source": ["x = 1', encoding="utf-8")
+    assert _load_notebook(path) == ""
+
+
+def test_large_notebook_memory_and_latency(tmp_path):
+    path = tmp_path / "large.ipynb"
+    image_bytes = 1024 * 1024
+    n_cells = max(1, LARGE_NOTEBOOK_MB * 1024 * 1024 * 3 // 4 // image_bytes)
+    expected = _write_notebook(path, n_cells=n_cells, image_bytes=image_bytes)
+    assert path.stat().st_size >= LARGE_NOTEBOOK_MB * 1024 * 1024 * 0.9
+
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        content = _load_notebook(path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert content == expected
+    # Outputs are never materialized: peak stays near the read window, not the file size
+    assert peak < 8 * 1024 * 1024
+    # Generous bound (includes tracemalloc overhead); json.loads is not streaming-safe here
+    assert elapsed < max(2.0, LARGE_NOTEBOOK_MB / 10)
+
+
+def _check_windows(path: Path, window_bytes: int):
+    data = path.read_bytes()
+    windows = list(_iter_file_windows(path, window_bytes=window_bytes))
+    rebuilt = b""
+    for text, start_line, offset in windows:
+        assert offset == len(rebuilt)
+        assert start_line == data[:offset].count(b"\n") + 1
+        raw = text.encode("utf-8")
+        assert len(raw) <= window_bytes
+        if data[offset + len(raw):offset + len(raw) + 1] == b"\n":
+            raw += b"\n"
+        rebuilt += raw
+    assert rebuilt == data
+    return windows
+
+
+def test_file_windows_rejoin_with_line_numbers(tmp_path):
+    path = tmp_path / "big.py"
+    path.write_text("".join(f"def f{i}():  # é\n    return {i}\n" for i in range(20000)), encoding="utf-8")
+    windows = _check_windows(path, window_bytes=64 * 1024)
+    assert len(windows) > 1
+    data = path.read_bytes()
+    assert all(data[offset - 1:offset] == b"\n" for _, _, offset in windows[1:])  # Whole lines only
+
+
+def test_long_line_windows_split_on_char_boundary(tmp_path):
+    path = tmp_path / "bundle.min.js"
+    path.write_text("var s='" + "aé☃😀" * 80_000 + "';\nconsole.log(s);\n", encoding="utf-8")
+    windows = _check_windows(path, window_bytes=256 * 1024)
+    assert len(windows) > 2
+    assert all("�" not in w[0] for w in windows)
+    assert len({w[2] for w in windows}) == len(windows)  # Offsets give unique chunk ids
+    assert windows[-1][1] == 1 and windows[-1][0].endswith("console.log(s);")
+
+
+def test_load_source_files_windows_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(repo_loader, "LARGE_FILE_BYTES", 1024)
+    monkeypatch.setattr(repo_loader, "WINDOW_BYTES", 512)
+    (tmp_path / "small.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "large.js").write_text("".join(f"const a{i} = {i};\n" for i in range(500)), encoding="utf-8")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "dep.js").write_text("skip()\n", encoding="utf-8")
+
+    loaded = list(load_source_files(str(tmp_path)))
+    by_path = {}
+    for rel_path, content, start_line, offset in loaded:
+        by_path.setdefault(rel_path, []).append((start_line, offset))
+    assert set(by_path) == {"small.py", "large.js"}
+    assert by_path["small.py"] == [(1, 0)]
+    assert len(by_path["large.js"]) > 1
+    assert by_path["large.js"][0] == (1, 0)
@@ -0,0 +1,161 @@
+"""
+Tests for rag.repo_map: symbols, import graph, path subsets, persistence
+and doc seeding.
+"""
+
+import main
+from rag import repo_loader
+from rag.repo_loader import load_source_files
+from rag.repo_map import RepoMapBuilder, RepoMapStore, representative_files, subset
+
+
+def _build():
+    builder = RepoMapBuilder("owner/repo")
+    builder.add_file("app/main.py", "from .models import User\n\n\nclass App:\n    def run(self):\n        pass\n")
+    builder.add_file("app/models.py", "class User:\n    pass\n")
+    builder.add_file("web/index.js", "const api = require('./api');\nfunction start() {}\n")
+    builder.add_file("web/api.js", "export const get = (url) => fetch(url);\n")
+    return builder.build()
+
+
+def test_symbols_and_imports():
+    repo_map = _build()
+    symbols = repo_map["files"]["app/main.py"]["symbols"]
+    assert [(s["name"], s["start_line"], s["end_line"]) for s in symbols] == [("App", 4, 6), ("App.run", 5, 6)]
+    assert repo_map["imports"] == {"app/main.py": ["app/models.py"], "web/index.js": ["web/api.js"]}
+    assert repo_map["files"]["app/models.py"]["imported_by"] == 1
+
+
+def test_subset_recomputes_stats():
+    repo_map = _build()
+    web = subset(repo_map, "web/")
+    assert sorted(web["files"]) == ["web/api.js", "web/index.js"]
+    assert web["tree"] == {"web": {"api.js": None, "index.js": None}}
+    assert web["stats"]["files"] == 2
+    assert list(web["stats"]["by_extension"]) == [".js"]
+    assert web["stats"]["lines"] == sum(f["lines"] for f in web["files"].values())
+    assert repo_map["stats"]["files"] == 4
+
+
+def test_line_counts_are_exact():
+    repo_map = _build()
+    assert {p: f["lines"] for p, f in repo_map["files"].items()} == {
+        "app/main.py": 6,
+        "app/models.py": 2,
+        "web/index.js": 2,
+        "web/api.js": 1,
+    }
+    assert repo_map["stats"]["lines"] == 11
+    # Last regex symbol ends on the last line, not one past it
+    assert repo_map["files"]["web/index.js"]["symbols"][-1]["end_line"] == 2
+
+    builder = RepoMapBuilder("r")
+    builder.add_file("no_newline.py", "a = 1\nb = 2")
+    builder.add_file("empty.py", "")
+    files = builder.build()["files"]
+    assert files["no_newline.py"]["lines"] == 2
+    assert files["empty.py"]["lines"] == 0
+
+
+def test_line_counts_across_windows(tmp_path, monkeypatch):
+    monkeypatch.setattr(repo_loader, "LARGE_FILE_BYTES", 1024)
+    monkeypatch.setattr(repo_loader, "WINDOW_BYTES", 512)
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "sub" / "large.js").write_text("".join(f"const a{i} = {i};\n" for i in range(500)), encoding="utf-8")
+    builder = RepoMapBuilder("r")
+    for path, content, start_line, _ in load_source_files(str(tmp_path)):
+        builder.add_file(path, content, start_line=start_line)
+    files = builder.build()["files"]
+    assert list(files) == ["pkg/sub/large.js"]
+    assert files["pkg/sub/large.js"]["lines"] == 500
+
+
+def test_store_round_trip(tmp_path):
+    repo_map = _build()
+    RepoMapStore(str(tmp_path)).save(repo_map)
+    # A fresh store reads from disk; repo ids with "/" map to a single file
+    store = RepoMapStore(str(tmp_path))
+    loaded = store.load("owner/repo")
+    assert loaded == repo_map
+    assert store.load("owner/repo") is loaded
+    assert store.load("owner/other") is None
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_store_save_replaces_cached_map(tmp_path):
+    store = RepoMapStore(str(tmp_path))
+    store.save(_build())
+    builder = RepoMapBuilder("owner/repo")
+    builder.add_file("only.py", "def f():\n    pass\n")
+    store.save(builder.build())
+    assert list(store.load("owner/repo")["files"]) == ["only.py"]
+    assert list(RepoMapStore(str(tmp_path)).load("owner/repo")["files"]) == ["only.py"]
+
+
+def test_representative_files():
+    builder = RepoMapBuilder("r")
+    builder.add_file("main.py", "import lib.core\n")
+    builder.add_file("lib/core.py", "def a(): pass\ndef b(): pass\n")
+    builder.add_file("lib/util.py", "from lib import core\ndef c(): pass\n")
+    builder.add_file("lib/extra.py", "def d(): pass\n")
+    builder.add_file("README.py", "x = 1\n")  # No symbols, not an entry point
+    repo_map = builder.build()
+    # Entry point (10), then imported twice with 2 symbols (6), then ties in path order
+    assert representative_files(repo_map) == ["main.py", "lib/core.py", "lib/extra.py", "lib/util.py"]
+    assert representative_files(repo_map, limit=2) == ["main.py", "lib/core.py"]
+    assert representative_files(repo_map, per_dir=1) == ["main.py", "lib/core.py"]
+
+
+class FakeChroma:
+    def __init__(self, chunks):
+        self.by_id = {c["id"]: c for c in chunks}
+        self.requested = []
+        self.queried = False
+
+    def get_chunks(self, ids):
+        self.requested.extend(ids)
+        return [self.by_id[i] for i in ids if i in self.by_id]
+
+    def query(self, question, repo_id=None, n_results=5):
+        self.queried = True
+        return [{"id": "fallback", "content": "fallback", "metadata": {}}]
+
+
+def _capture_docs(monkeypatch):
+    calls = {}
+
+    def generate(chunks, repo_id=None, structure=None):
+        calls.update(chunks=chunks, structure=structure)
+        return "docs"
+
+    monkeypatch.setattr(main, "generate_docs", generate)
+    return calls
+
+
+def test_generate_docs_seeds_from_repo_map(tmp_path, monkeypatch):
+    store = RepoMapStore(str(tmp_path))
+    store.save(_build())
+    chunk = {"id": "owner/repo::app/models.py::0", "content": "class User", "metadata": {}}
+    fake = FakeChroma([chunk])
+    monkeypatch.setattr(main, "repo_map_store", store)
+    monkeypatch.setattr(main, "chroma_client", fake)
+    calls = _capture_docs(monkeypatch)
+
+    assert main._generate_docs(main.GenerateDocsRequest(repo_id="owner/repo")).documentation == "docs"
+    seeds = representative_files(_build(), limit=main.DOCS_SEED_FILES)
+    assert fake.requested == [f"owner/repo::{p}::0" for p in seeds]
+    assert calls["chunks"] == [chunk]
+    assert not fake.queried
+    assert "- app/models.py (2 lines): User" in calls["structure"]
+
+
+def test_generate_docs_without_map_falls_back_to_search(tmp_path, monkeypatch):
+    fake = FakeChroma([])
+    monkeypatch.setattr(main, "repo_map_store", RepoMapStore(str(tmp_path)))
+    monkeypatch.setattr(main, "chroma_client", fake)
+    calls = _capture_docs(monkeypatch)
+
+    main._generate_docs(main.GenerateDocsRequest(repo_id="owner/unknown"))
+    assert fake.queried and fake.requested == []
+    assert calls["structure"] is None
+    assert [c["id"] for c in calls["chunks"]] == ["fallback"]
@@ -0,0 +1,122 @@
+"""
+Tests for the rerank stage: rag.reranker.Reranker and the over-fetch in main._retrieve.
+A stub cross-encoder stands in for the model weights.
+"""
+
+import threading
+import time
+
+import pytest
+
+import main
+from rag import reranker as reranker_module
+from rag.reranker import Reranker
+
+
+class StubCrossEncoder:
+    """Scores a pair by the number in its chunk text ("score=N"); optional delay/failure."""
+
+    delay = 0.0
+    fail = False
+    calls = 0
+
+    def __init__(self, model_name, max_length=512, device="cpu"):
+        self.model_name = model_name
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        type(self).calls += 1
+        if self.fail:
+            raise RuntimeError("model exploded")
+        time.sleep(self.delay)
+        return [float(text.split("score=")[1]) if "score=" in text else 0.0 for _, text in pairs]
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    monkeypatch.setattr(StubCrossEncoder, "delay", 0.0)
+    monkeypatch.setattr(StubCrossEncoder, "fail", False)
+    monkeypatch.setattr(StubCrossEncoder, "calls", 0)
+    monkeypatch.setattr(reranker_module, "CrossEncoder", StubCrossEncoder)
+    return StubCrossEncoder
+
+
+def _chunks(scores):
+    return [{"id": f"c{i}", "content": f"chunk score={s}", "metadata": {}} for i, s in enumerate(scores)]
+
+
+def test_rerank_orders_by_score_and_keeps_top_k(stub_model):
+    rr = Reranker(budget_ms=1000)
+    out = rr.rerank("q", _chunks([1, 9, 3, 7, 5, 2]), top_k=3)
+    assert [c["id"] for c in out] == ["c1", "c3", "c4"]
+
+
+def test_rerank_timeout_falls_back_to_vector_order(stub_model):
+    stub_model.delay = 0.5
+    rr = Reranker(budget_ms=50)
+    chunks = _chunks([1, 9, 3, 7])
+    start = time.perf_counter()
+    out = rr.rerank("q", chunks, top_k=2)
+    assert time.perf_counter() - start < 0.3  # Budget enforced, not 2x
+    assert out == chunks[:2]
+
+
+def test_rerank_deadline_includes_queueing(stub_model):
+    stub_model.delay = 0.4
+    rr = Reranker(budget_ms=1000, max_workers=1)
+    busy = threading.Thread(target=rr.rerank, args=("q", _chunks([1, 2])))
+    busy.start()
+    time.sleep(0.05)
+    rr.budget_ms = 100
+    start = time.perf_counter()
+    chunks = _chunks([1, 9])
+    assert rr.rerank("q", chunks, top_k=1) == chunks[:1]
+    assert time.perf_counter() - start < 0.3
+    busy.join()
+
+
+def test_abandoned_pass_stops_after_current_batch(stub_model):
+    stub_model.delay = 0.1
+    rr = Reranker(budget_ms=50, batch_size=2, max_workers=1)
+    rr.rerank("q", _chunks(range(20)), top_k=5)
+    time.sleep(0.3)
+    # 10 batches requested; the abandoned pass gave up after the batch in progress
+    assert stub_model.calls <= 2
+
+
+def test_rerank_error_falls_back_to_vector_order(stub_model):
+    stub_model.fail = True
+    rr = Reranker(budget_ms=1000)
+    chunks = _chunks([1, 9, 3])
+    assert rr.rerank("q", chunks, top_k=2) == chunks[:2]
+
+
+class FakeChroma:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.queries = []
+
+    def query(self, question, repo_id=None, n_results=5):
+        self.queries.append(n_results)
+        return list(self.chunks[:n_results])
+
+    def get_chunks(self, ids):
+        by_id = {c["id"]: c for c in self.chunks}
+        return [by_id[i] for i in ids if i in by_id]
+
+
+def test_retrieve_overfetches_and_reranks(stub_model, monkeypatch):
+    fake = FakeChroma(_chunks(range(30)))
+    monkeypatch.setattr(main, "chroma_client", fake)
+    monkeypatch.setattr(main, "reranker", Reranker(budget_ms=1000))
+    out = main._retrieve("q", "owner/repo")
+    assert fake.queries == [main.RERANK_CANDIDATES]
+    assert [c["id"] for c in out] == [f"c{i}" for i in range(main.RERANK_CANDIDATES - 1, main.RERANK_CANDIDATES - 1 - main.ASK_TOP_K, -1)]
+
+
+def test_retrieve_without_reranker_fetches_top_k(monkeypatch):
+    fake = FakeChroma(_chunks(range(30)))
+    monkeypatch.setattr(main, "chroma_client", fake)
+    monkeypatch.setattr(main, "reranker", None)
+    out = main._retrieve("q", "owner/repo")
+    assert fake.queries == [main.ASK_TOP_K]
+    assert [c["id"] for c in out] == [f"c{i}" for i in range(main.ASK_TOP_K)]
@@ -0,0 +1,201 @@
+"""
+Tests for chat sessions: rag.sessions and the session paths in main (_retrieve, _ask).
+"""
+
+import pytest
+
+import main
+from rag import rag_pipeline
+from rag.concurrency import PriorityLimiter
+from rag.sessions import ChatSession, SessionStore, covered_by
+
+
+def _chunk(i, content=None):
+    return {"id": f"c{i}", "content": content or f"def f{i}(): pass", "metadata": {}}
+
+
+class FakeChroma:
+    def __init__(self, chunks):
+        self.by_id = {c["id"]: c for c in chunks}
+        self.ranked = list(chunks)
+        self.queries = 0
+
+    def query(self, question, repo_id=None, n_results=5):
+        self.queries += 1
+        return list(self.ranked[:n_results])
+
+    def get_chunks(self, ids):
+        return [self.by_id[i] for i in ids if i in self.by_id]
+
+
+# --- SessionStore ---
+
+
+def test_store_expires_idle_sessions():
+    store = SessionStore(max_sessions=10, ttl_seconds=60)
+    s = store.create("owner/repo")
+    assert store.get(s.session_id) is s
+    s.last_access -= 61
+    assert store.get(s.session_id) is None
+
+
+def test_store_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2, ttl_seconds=60)
+    a, b = store.create(), store.create()
+    store.get(a.session_id)  # b is now least recently used
+    c = store.create()
+    assert store.get(b.session_id) is None
+    assert store.get(a.session_id) is a and store.get(c.session_id) is c
+
+
+def test_resume_recreates_for_other_repo_or_unknown_id():
+    store = SessionStore()
+    s = store.create("owner/a")
+    assert store.resume(s.session_id, "owner/a") is s
+    other = store.resume(s.session_id, "owner/b")
+    assert other is not s and other.repo_id == "owner/b"
+    assert store.resume("missing", "owner/a").repo_id == "owner/a"
+
+
+def test_delete():
+    store = SessionStore()
+    s = store.create()
+    assert store.delete(s.session_id)
+    assert not store.delete(s.session_id)
+
+
+# --- ChatSession ---
+
+
+def test_pop_overflow_releases_turns_in_batches():
+    s = ChatSession("id")
+    popped = []
+    for i in range(7):
+        s.add_turn(f"q{i}", f"a{i}", [])
+        popped.append([t["question"] for t in s.pop_overflow(keep_recent=2, condense_batch=2)])
+    assert popped == [[], [], [], ["q0", "q1"], [], ["q2", "q3"], []]
+    assert [t["question"] for t in s.turns] == ["q4", "q5", "q6"]
+
+
+def test_history_prompt_truncates_answers():
+    s = ChatSession("id")
+    s.summary = "Talked about auth."
+    s.add_turn("q", "x" * 1000, [])
+    prompt = s.history_prompt(max_answer_chars=400)
+    assert prompt.startswith("Summary of earlier conversation: Talked about auth.")
+    assert "x" * 400 + "..." in prompt and "x" * 401 not in prompt
+
+
+# --- covered_by ---
+
+
+@pytest.mark.parametrize(
+    "question, covered",
+    [
+        ("why does it do that?", True),
+        ("how does retry_request handle errors?", False),  # "errors" not in context
+        ("how does retry_request work?", True),
+        ("what is main?", False),  # "domain" must not cover "main"
+        ("where is the user stored?", False),  # "username" must not cover "user"
+        ("What does DOMAIN mean here?", True),
+    ],
+)
+def test_covered_by_matches_whole_identifiers(question, covered):
+    chunks = [{"content": "def retry_request(domain, username):\n    return domain"}]
+    assert covered_by(question, chunks) is covered
+
+
+# --- main._retrieve follow-ups ---
+
+
+@pytest.fixture
+def fake_chroma(monkeypatch):
+    fake = FakeChroma([_chunk(i) for i in range(20)])
+    monkeypatch.setattr(main, "chroma_client", fake)
+    monkeypatch.setattr(main, "reranker", None)
+    return fake
+
+
+def test_followup_covered_by_context_skips_search(fake_chroma):
+    previous = ["c10", "c11", "c12"]
+    out = main._retrieve("why is that?", "r", previous_ids=previous)
+    assert [c["id"] for c in out] == previous
+    assert fake_chroma.queries == 0
+
+
+def test_followup_keeps_previous_first_and_stays_at_top_k(fake_chroma):
+    previous = [f"c{i}" for i in range(10, 10 + main.ASK_TOP_K)]
+    out = main._retrieve("how does login_handler work?", "r", previous_ids=previous)
+    ids = [c["id"] for c in out]
+    assert len(ids) == main.ASK_TOP_K
+    new = [f"c{i}" for i in range(main.FOLLOWUP_NEW_CHUNKS)]
+    # Oldest previous chunks make room; the rest are kept in order, new hits appended
+    assert ids == previous[main.FOLLOWUP_NEW_CHUNKS:] + new
+    assert fake_chroma.queries == 1
+
+
+def test_followup_skips_hits_already_in_context(fake_chroma):
+    out = main._retrieve("how does login_handler work?", "r", previous_ids=["c0", "c15"])
+    ids = [c["id"] for c in out]
+    assert ids[:2] == ["c0", "c15"]
+    assert len(ids) == len(set(ids))
+
+
+# --- main._ask session flow ---
+
+
+@pytest.fixture
+def ask_env(monkeypatch, fake_chroma):
+    store = SessionStore()
+    prompts = []
+
+    def answer(question, chunks, repo_id=None, history=None):
+        prompts.append({"chunks": len(chunks), "history": history or ""})
+        return f"answer to {question}"
+
+    monkeypatch.setattr(main, "session_store", store)
+    monkeypatch.setattr(main, "answer_question", answer)
+    monkeypatch.setattr(main, "condense_history", lambda summary, turns: summary + "|" + ",".join(t["question"] for t in turns))
+    return store, prompts
+
+
+def test_ask_with_mismatched_repo_starts_new_session(ask_env):
+    store, _ = ask_env
+    s = store.create("owner/a")
+    s.add_turn("old", "old answer", ["c1"])
+    resp = main._ask(main.AskRequest(question="hi there_fn", repo_id="owner/b", session_id=s.session_id))
+    assert resp.session_id != s.session_id
+    new = store.get(resp.session_id)
+    assert new.repo_id == "owner/b"
+    assert [t["question"] for t in new.turns] == ["hi there_fn"]
+
+
+def test_ask_keeps_prompt_bounded_over_long_chat(ask_env):
+    store, prompts = ask_env
+    session_id = store.create("r").session_id
+    for i in range(12):
+        resp = main._ask(main.AskRequest(question=f"what about topic_{i}?", repo_id="r", session_id=session_id))
+        assert resp.session_id == session_id
+    assert all(p["chunks"] <= main.ASK_TOP_K for p in prompts)
+    max_turns = main.SESSION_RECENT_TURNS + main.SESSION_CONDENSE_BATCH - 1
+    assert all(p["history"].count("User: ") <= max_turns for p in prompts)
+    session = store.get(session_id)
+    assert "what about topic_0?" in session.summary
+
+
+def test_ask_keeps_answer_when_condensing_is_rate_limited(monkeypatch, fake_chroma):
+    store = SessionStore()
+    monkeypatch.setattr(main, "session_store", store)
+    monkeypatch.setattr(main, "answer_question", lambda question, chunks, repo_id=None, history=None: f"answer to {question}")
+    # No LLM slot ever frees up, so the summary call times out
+    monkeypatch.setattr(rag_pipeline, "_llm_limiter", PriorityLimiter(0))
+    monkeypatch.setattr(rag_pipeline, "LLM_MAX_WAIT", 0.05)
+
+    session_id = store.create("r").session_id
+    turns = main.SESSION_RECENT_TURNS + main.SESSION_CONDENSE_BATCH
+    for i in range(turns):
+        resp = main._ask(main.AskRequest(question=f"what about topic_{i}?", repo_id="r", session_id=session_id))
+        assert resp.answer == f"answer to what about topic_{i}?"
+    session = store.get(session_id)
+    assert session.summary == "Earlier questions: what about topic_0?; what about topic_1?"
+    assert [t["question"] for t in session.turns] == [f"what about topic_{i}?" for i in range(2, turns)]
@@ -5,8 +5,22 @@ export default function ChatInterface({ repoId }) {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
   const listRef = useRef(null);
 
+  // New repo -> new conversation; end the old server-side session
+  useEffect(() => {
+    setMessages([]);
+    setSessionId(null);
+  }, [repoId]);
+
+  useEffect(() => {
+    if (!sessionId) return;
+    return () => {
+      ai.deleteSession(sessionId).catch(() => {});
+    };
+  }, [sessionId]);
+
   useEffect(() => {
     listRef.current?.scrollTo(0, listRef.current.scrollHeight);
   }, [messages]);
@@ -19,7 +33,15 @@ export default function ChatInterface({ repoId }) {
     setMessages((m) => [...m, { role: "user", content: q }]);
     setLoading(true);
     try {
-      const { data } = await ai.ask(q, repoId);
+      let sid = sessionId;
+      if (!sid) {
+        const { data: session } = await ai.createSession(repoId);
+        sid = session.session_id;
+        // Keep it even if the ask below fails, so a retry doesn't open another session
+        setSessionId(sid);
+      }
+      const { data } = await ai.ask(q, repoId, sid);
+      setSessionId(data.session_id || null);
       setMessages((m) => [...m, { role: "assistant", content: data.answer }]);
     } catch (err) {
       setMessages((m) => [
@@ -44,10 +44,16 @@ export const repo = {
 };
 
 export const ai = {
-  ask: (question, repoId) =>
-    api.post("/ai/ask", { question, repo_id: repoId }),
+  ask: (question, repoId, sessionId) =>
+    api.post("/ai/ask", { question, repo_id: repoId, session_id: sessionId || undefined }),
+  createSession: (repoId) =>
+    api.post("/ai/sessions", { repo_id: repoId }),
+  deleteSession: (sessionId) =>
+    api.delete(`/ai/sessions/${encodeURIComponent(sessionId)}`),
   explain: (code, language) =>
     api.post("/ai/explain", { code, language: language || "python" }),
   generateDocs: (repoId) =>
     api.post("/ai/generate-docs", { repo_id: repoId }),
+  repoMap: (repoId, path) =>
+    api.get("/ai/repo-map", { params: { repo_id: repoId, path: path || undefined } }),
 };
@@ -1,21 +1,51 @@
 /**
- * AI controller: forward ask, explain, generate-docs to Python.
+ * AI controller: forward ask, sessions, explain, generate-docs, repo-map to Python.
  */
 
 const aiClient = require("../config/aiService");
 
+// Lets the AI service rate-limit per user
+const userHeaders = (req) => ({ headers: { "X-DevMind-User": String(req.user._id) } });
+
+const sendError = (res, err) => {
+  const status = err.response?.status || 500;
+  const msg = err.response?.data?.detail || err.message;
+  const retryAfter = err.response?.headers?.["retry-after"];
+  if (retryAfter) {
+    res.set("Retry-After", retryAfter);
+  }
+  res.status(status).json({ error: msg });
+};
+
 exports.ask = async (req, res) => {
   try {
-    const { question, repo_id } = req.body;
+    const { question, repo_id, session_id } = req.body;
     if (!question) {
       return res.status(400).json({ error: "question required" });
     }
-    const { data } = await aiClient.post("/api/ask", { question, repo_id });
+    const { data } = await aiClient.post("/api/ask", { question, repo_id, session_id }, userHeaders(req));
+    res.json(data);
+  } catch (err) {
+    sendError(res, err);
+  }
+};
+
+exports.createSession = async (req, res) => {
+  try {
+    const { repo_id } = req.body;
+    const { data } = await aiClient.post("/api/sessions", { repo_id });
+    res.json(data);
+  } catch (err) {
+    sendError(res, err);
+  }
+};
+
+exports.deleteSession = async (req, res) => {
+  try {
+    const { data } = await aiClient.delete(`/api/sessions/${encodeURIComponent(req.params.sessionId)}`);
     res.json(data);
   } catch (err) {
-    const status = err.response?.status || 500;
-    const msg = err.response?.data?.detail || err.message;
-    res.status(status).json({ error: msg });
+    sendError(res, err);
   }
 };
 
@@ -25,23 +55,32 @@ exports.explain = async (req, res) => {
     if (!code) {
       return res.status(400).json({ error: "code required" });
     }
-    const { data } = await aiClient.post("/api/explain", { code, language: language || "python" });
+    const { data } = await aiClient.post("/api/explain", { code, language: language || "python" }, userHeaders(req));
     res.json(data);
   } catch (err) {
-    const status = err.response?.status || 500;
-    const msg = err.response?.data?.detail || err.message;
-    res.status(status).json({ error: msg });
+    sendError(res, err);
   }
 };
 
 exports.generateDocs = async (req, res) => {
   try {
     const { repo_id } = req.body;
-    const { data } = await aiClient.post("/api/generate-docs", { repo_id });
+    const { data } = await aiClient.post("/api/generate-docs", { repo_id }, userHeaders(req));
+    res.json(data);
+  } catch (err) {
+    sendError(res, err);
+  }
+};
+
+exports.repoMap = async (req, res) => {
+  try {
+    const { repo_id, path } = req.query;
+    if (!repo_id) {
+      return res.status(400).json({ error: "repo_id required" });
+    }
+    const { data } = await aiClient.get("/api/repo-map", { params: { repo_id, path } });
     res.json(data);
   } catch (err) {
-    const status = err.response?.status || 500;
-    const msg = err.response?.data?.detail || err.message;
-    res.status(status).json({ error: msg });
+    sendError(res, err);
   }
 };
@@ -1,5 +1,5 @@
 /**
- * AI routes: ask, explain, generate-docs (forward to Python).
+ * AI routes: ask, sessions, explain, generate-docs, repo-map (forward to Python).
  */
 
 const express = require("express");
@@ -8,7 +8,10 @@ const auth = require("../middleware/auth");
 const aiController = require("../controllers/aiController");
 
 router.post("/ask", auth, aiController.ask);
+router.post("/sessions", auth, aiController.createSession);
+router.delete("/sessions/:sessionId", auth, aiController.deleteSession);
 router.post("/explain", auth, aiController.explain);
 router.post("/generate-docs", auth, aiController.generateDocs);
+router.get("/repo-map", auth, aiController.repoMap);
 
 module.exports = router;